@@ -0,0 +1,46 @@
+"""baseline papers table and indexes
+
+Everything here is IF NOT EXISTS so the migration can be applied cleanly
+on top of a database created by the old startup DDL.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-09-01
+
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+    CREATE TABLE IF NOT EXISTS papers (
+        id TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        content_hash TEXT,
+        status TEXT NOT NULL DEFAULT 'processing',
+        csl_json JSONB,
+        one_liner TEXT,
+        summary_150w TEXT,
+        keywords JSONB,
+        citations JSONB,
+        tei_xml TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    """)
+    # Columns added over time; no-ops on fresh databases, upgrades old ones.
+    op.execute("ALTER TABLE papers ADD COLUMN IF NOT EXISTS citations JSONB;")
+    op.execute("ALTER TABLE papers ADD COLUMN IF NOT EXISTS content_hash TEXT;")
+    op.execute("ALTER TABLE papers ADD COLUMN IF NOT EXISTS tei_xml TEXT;")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_papers_created_at ON papers (created_at DESC);")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_papers_status ON papers (status) WHERE status = 'processing';")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS papers;")
@@ -0,0 +1,24 @@
+"""GIN index over citations for JSONB path queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-09-01
+
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_papers_citations_gin "
+        "ON papers USING GIN (citations jsonb_path_ops);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_papers_citations_gin;")